@@ -85,10 +85,10 @@ class SystemSerializer(PassiveSerializer):
 
     def get_embedded_outpost_host(self, request: Request) -> str:
         """Get the FQDN configured on the embeddded outpost"""
-        outposts = Outpost.objects.filter(managed=MANAGED_OUTPOST)
-        if not outposts.exists():
+        outpost = Outpost.objects.filter(managed=MANAGED_OUTPOST).first()
+        if not outpost:
             return ""
-        return outposts.first().config.authentik_host
+        return outpost.config.authentik_host
 
 
 class SystemView(APIView):
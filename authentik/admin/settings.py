@@ -1,6 +1,8 @@
 """authentik admin settings"""
 from celery.schedules import crontab
 
+__all__ = ["CELERY_BEAT_SCHEDULE"]
+
 CELERY_BEAT_SCHEDULE = {
     "admin_latest_version": {
         "task": "authentik.admin.tasks.update_latest_version",
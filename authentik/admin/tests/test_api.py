@@ -7,7 +7,7 @@ from django.urls import reverse
 from authentik import __version__
 from authentik.core.models import Group, User
 from authentik.core.tasks import clean_expired_models
-from authentik.events.monitored_tasks import TaskResultStatus
+from authentik.events.monitored_tasks import TaskInfo, TaskResultStatus
 
 
 class TestAdminAPI(TestCase):
@@ -29,6 +29,15 @@ class TestAdminAPI(TestCase):
         body = loads(response.content)
         self.assertTrue(any(task["task_name"] == "clean_expired_models" for task in body))
 
+    def test_tasks_deleted(self):
+        """Test Task API (deleted tasks are removed from the index)"""
+        clean_expired_models.delay()
+        TaskInfo.by_name("clean_expired_models").delete()
+        response = self.client.get(reverse("authentik_api:admin_system_tasks-list"))
+        self.assertEqual(response.status_code, 200)
+        body = loads(response.content)
+        self.assertFalse(any(task["task_name"] == "clean_expired_models" for task in body))
+
     def test_tasks_single(self):
         """Test Task API (read single)"""
         clean_expired_models.delay()
@@ -1,5 +1,7 @@
 """events GeoIP Reader"""
 from datetime import datetime
+from functools import lru_cache
+from ipaddress import ip_address as parse_ip_address
 from os import stat
 from time import time
 from typing import Optional, TypedDict
@@ -41,6 +43,8 @@ class GeoIPReader:
             reader = Reader(path)
             self.__reader = reader
             self.__last_mtime = stat(path).st_mtime
+            # Results from the previous database might be outdated
+            self.__city.cache_clear()
             LOGGER.info("Loaded GeoIP database", last_write=self.__last_mtime)
         except OSError as exc:
             LOGGER.warning("Failed to load GeoIP database", exc=exc)
@@ -65,7 +69,14 @@ class GeoIPReader:
         if not self.enabled:
             return None
         self.__check_expired()
+        return self.__city(ip_address)
+
+    @lru_cache(maxsize=4096)
+    def __city(self, ip_address: str) -> Optional[City]:
+        """Cached lookup, private addresses are never in the database"""
         try:
+            if parse_ip_address(ip_address).is_private:
+                return None
             return self.__reader.city(ip_address)
         except (GeoIP2Error, ValueError):
             return None
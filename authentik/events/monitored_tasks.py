@@ -2,21 +2,38 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
+from hashlib import sha256
 from timeit import default_timer
 from traceback import format_tb
 from typing import Any, Optional
 
 from celery import Task
 from django.core.cache import cache
+from django_redis import get_redis_connection
 from prometheus_client import Gauge
+from redis.exceptions import RedisError
+from structlog.stdlib import get_logger
 
 from authentik.events.models import Event, EventAction
 
+LOGGER = get_logger()
+
 GAUGE_TASKS = Gauge(
     "authentik_system_tasks",
     "System tasks and their status",
-    ["task_name", "task_uid", "status"],
+    ["task_name", "status"],
 )
+# Redis set of all cache keys TaskInfo objects are saved under, so we don't
+# have to scan the entire keyspace to list tasks
+TASK_INDEX_KEY = "goauthentik.io/events/tasks/index"
+# Set once the index has been built from keys saved before it existed. Neither key uses the
+# `task_` prefix, so they can't collide with a task or be read as one by older versions
+TASK_INDEX_REBUILT_KEY = "goauthentik.io/events/tasks/index_rebuilt"
+# Task descriptions longer than this are shortened to their first line when cached
+TASK_DESCRIPTION_MAX_LENGTH = 256
+# Only create one event for the same exception of a task within this many seconds
+TASK_EXCEPTION_EVENT_TIMEOUT = 60
 
 
 class TaskResultStatus(Enum):
@@ -39,12 +56,32 @@ class TaskResult:
     # Optional UID used in cache for tasks that run in different instances
     uid: Optional[str] = field(default=None)
 
+    # Error set by `with_error`, only formatted when needed as it might not be pickle-able
+    _error: Optional[Exception] = field(default=None, repr=False, compare=False)
+
     def with_error(self, exc: Exception) -> "TaskResult":
-        """Since errors might not always be pickle-able, set the traceback"""
-        self.messages.extend(format_tb(exc.__traceback__))
-        self.messages.append(str(exc))
+        """Since errors might not always be pickle-able, set the traceback.
+        The traceback is only formatted once the result is saved, see `format_error`"""
+        self._error = exc
         return self
 
+    def _error_messages(self) -> list[str]:
+        """Traceback and message of the error set with `with_error`"""
+        if not self._error:
+            return []
+        return format_tb(self._error.__traceback__) + [str(self._error)]
+
+    def format_error(self):
+        """Add traceback and message of the error set with `with_error` to messages"""
+        self.messages.extend(self._error_messages())
+        self._error = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["messages"] = self.messages + self._error_messages()
+        state["_error"] = None
+        return state
+
 
 @dataclass
 class TaskInfo:
@@ -64,24 +101,88 @@ class TaskInfo:
 
     task_description: Optional[str] = field(default=None)
 
-    @property
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("html_name", None)
+        description = state.get("task_description")
+        if description and len(description) > TASK_DESCRIPTION_MAX_LENGTH:
+            state["task_description"] = description.strip().splitlines()[0]
+        return state
+
+    @cached_property
     def html_name(self) -> list[str]:
         """Get task_name, but split on underscores, so we can join in the html template."""
         return self.task_name.split("_")
 
+    @staticmethod
+    def _index_keys() -> set[str]:
+        """Get all cache keys from the task index"""
+        try:
+            members = get_redis_connection().smembers(cache.make_key(TASK_INDEX_KEY))
+        except RedisError as exc:
+            LOGGER.warning("Failed to read task index", exc=exc)
+            return set()
+        if not members and cache.add(TASK_INDEX_REBUILT_KEY, True, None):
+            return TaskInfo._rebuild_index()
+        return {member.decode() for member in members}
+
+    @staticmethod
+    def _rebuild_index() -> set[str]:
+        """Find task keys which are not in the index (for example when they were saved by
+        an older version) and add them. Uses SCAN, as KEYS would block redis. This only runs
+        once, guarded by TASK_INDEX_REBUILT_KEY, as every task saved since is in the index."""
+        redis = get_redis_connection()
+        prefix_length = len(cache.make_key(""))
+        keys = set()
+        try:
+            for key in redis.scan_iter(match=cache.make_key("task_*"), count=500):
+                keys.add(key.decode()[prefix_length:])
+            if keys:
+                redis.sadd(cache.make_key(TASK_INDEX_KEY), *keys)
+        except RedisError as exc:
+            LOGGER.warning("Failed to rebuild task index", exc=exc)
+            cache.delete(TASK_INDEX_REBUILT_KEY)
+            return set()
+        return keys
+
     @staticmethod
     def all() -> dict[str, "TaskInfo"]:
         """Get all TaskInfo objects"""
-        return cache.get_many(cache.keys("task_*"))
+        keys = TaskInfo._index_keys()
+        if not keys:
+            return {}
+        tasks = {
+            key: task for key, task in cache.get_many(keys).items() if isinstance(task, TaskInfo)
+        }
+        # Remove keys of tasks which have expired from the cache since, or don't hold a task
+        expired = keys - tasks.keys()
+        if expired:
+            try:
+                get_redis_connection().srem(cache.make_key(TASK_INDEX_KEY), *expired)
+            except RedisError as exc:
+                LOGGER.warning("Failed to prune task index", exc=exc)
+        return tasks
 
     @staticmethod
     def by_name(name: str) -> Optional["TaskInfo"]:
         """Get TaskInfo Object by name"""
-        return cache.get(f"task_{name}")
+        task = cache.get(f"task_{name}")
+        if not isinstance(task, TaskInfo):
+            return None
+        return task
 
     def delete(self):
         """Delete task info from cache"""
-        return cache.delete(f"task_{self.task_name}")
+        key = f"task_{self.task_name}"
+        pipeline = get_redis_connection().pipeline()
+        pipeline.delete(cache.make_key(key))
+        pipeline.srem(cache.make_key(TASK_INDEX_KEY), key)
+        try:
+            deleted, _ = pipeline.execute()
+        except RedisError as exc:
+            LOGGER.warning("Failed to delete task info", task_name=self.task_name, exc=exc)
+            return False
+        return bool(deleted)
 
     def set_prom_metrics(self):
         """Update prometheus metrics"""
@@ -94,7 +195,6 @@ class TaskInfo:
             duration = 0
         GAUGE_TASKS.labels(
             task_name=self.task_name,
-            task_uid=self.result.uid or "",
             status=self.result.status,
         ).set(duration)
 
@@ -104,8 +204,18 @@ class TaskInfo:
         if self.result.uid:
             key += f"_{self.result.uid}"
             self.task_name += f"_{self.result.uid}"
+            self.__dict__.pop("html_name", None)
         self.set_prom_metrics()
-        cache.set(key, self, timeout=timeout_hours * 60 * 60)
+        # Write the task and add it to the index in a single round-trip. The value is encoded
+        # by the cache client, so it can be read with the normal cache API
+        pipeline = get_redis_connection().pipeline()
+        pipeline.set(cache.make_key(key), cache.client.encode(self), ex=timeout_hours * 60 * 60)
+        pipeline.sadd(cache.make_key(TASK_INDEX_KEY), key)
+        try:
+            pipeline.execute()
+        except RedisError as exc:
+            # Same as the cache API with IGNORE_EXCEPTIONS, a failed save shouldn't fail the task
+            LOGGER.warning("Failed to save task info", task_name=self.task_name, exc=exc)
 
 
 class MonitoredTask(Task):
@@ -134,33 +244,13 @@ class MonitoredTask(Task):
         """Set result for current run, will overwrite previous result."""
         self._result = result
 
-    # pylint: disable=too-many-arguments
-    def after_return(self, status, retval, task_id, args: list[Any], kwargs: dict[str, Any], einfo):
-        if self._result:
-            if not self._result.uid:
-                self._result.uid = self._uid
-            if self.save_on_success:
-                TaskInfo(
-                    task_name=self.__name__,
-                    task_description=self.__doc__,
-                    start_timestamp=self.start,
-                    finish_timestamp=default_timer(),
-                    finish_time=datetime.now(),
-                    result=self._result,
-                    task_call_module=self.__module__,
-                    task_call_func=self.__name__,
-                    task_call_args=args,
-                    task_call_kwargs=kwargs,
-                ).save(self.result_timeout_hours)
-        return super().after_return(status, retval, task_id, args, kwargs, einfo=einfo)
-
-    # pylint: disable=too-many-arguments
-    def on_failure(self, exc, task_id, args, kwargs, einfo):
-        if not self._result:
-            self._result = TaskResult(status=TaskResultStatus.ERROR, messages=[str(exc)])
+    def _build_task_info(self, args: list[Any], kwargs: dict[str, Any]) -> TaskInfo:
+        """Build TaskInfo for the current run from the result set with `set_status`"""
         if not self._result.uid:
             self._result.uid = self._uid
-        TaskInfo(
+        # Format the error now, so the exception isn't kept on the task until the next run
+        self._result.format_error()
+        return TaskInfo(
             task_name=self.__name__,
             task_description=self.__doc__,
             start_timestamp=self.start,
@@ -171,18 +261,45 @@ class MonitoredTask(Task):
             task_call_func=self.__name__,
             task_call_args=args,
             task_call_kwargs=kwargs,
-        ).save(self.result_timeout_hours)
-        Event.new(
-            EventAction.SYSTEM_TASK_EXCEPTION,
-            message=(
-                f"Task {self.__name__} encountered an error: " "\n".join(self._result.messages)
-            ),
-        ).save()
+        )
+
+    # pylint: disable=too-many-arguments
+    def after_return(self, status, retval, task_id, args: list[Any], kwargs: dict[str, Any], einfo):
+        if self._result:
+            if self.save_on_success:
+                self._build_task_info(args, kwargs).save(self.result_timeout_hours)
+            else:
+                # Nothing is saved, but the exception still shouldn't be kept on the task
+                self._result.format_error()
+        return super().after_return(status, retval, task_id, args, kwargs, einfo=einfo)
+
+    # pylint: disable=too-many-arguments
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        if not self._result:
+            self._result = TaskResult(status=TaskResultStatus.ERROR, messages=[str(exc)])
+        self._build_task_info(args, kwargs).save(self.result_timeout_hours)
+        # Flapping tasks shouldn't flood the database with identical events
+        fingerprint = sha256(f"{type(exc).__name__}:{str(exc)[:64]}".encode()).hexdigest()
+        if cache.add(
+            f"event_task_exception_{self.__name__}_{fingerprint}",
+            True,
+            timeout=TASK_EXCEPTION_EVENT_TIMEOUT,
+        ):
+            Event.new(
+                EventAction.SYSTEM_TASK_EXCEPTION,
+                message=(
+                    f"Task {self.__name__} encountered an error: " "\n".join(self._result.messages)
+                ),
+            ).save()
         return super().on_failure(exc, task_id, args, kwargs, einfo=einfo)
 
     def run(self, *args, **kwargs):
         raise NotImplementedError
 
 
-for task in TaskInfo.all().values():
-    task.set_prom_metrics()
+# Re-populate prometheus metrics on import. Expired keys are only pruned from the index
+# by TaskInfo.all(), so concurrently starting workers don't all write
+_task_keys = TaskInfo._index_keys()
+if _task_keys:
+    for task in cache.get_many(_task_keys).values():
+        task.set_prom_metrics()
@@ -24,3 +24,8 @@ class TestGeoIP(TestCase):
                 "long": -1.25,
             },
         )
+
+    def test_private(self):
+        """Test private addresses are not looked up"""
+        self.assertIsNone(self.reader.city("10.0.0.1"))
+        self.assertIsNone(self.reader.city_dict("::1"))
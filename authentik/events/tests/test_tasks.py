@@ -0,0 +1,148 @@
+"""Monitored task tests"""
+from datetime import datetime
+from timeit import default_timer
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django_redis import get_redis_connection
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from authentik.events.models import Event, EventAction
+from authentik.events.monitored_tasks import (
+    TASK_INDEX_KEY,
+    TASK_INDEX_REBUILT_KEY,
+    MonitoredTask,
+    TaskInfo,
+    TaskResult,
+    TaskResultStatus,
+)
+from authentik.lib.generators import generate_id
+from authentik.root.celery import CELERY_APP
+
+
+def task_info(name: str) -> TaskInfo:
+    """Create a successful TaskInfo"""
+    return TaskInfo(
+        task_name=name,
+        start_timestamp=default_timer(),
+        finish_timestamp=default_timer(),
+        finish_time=datetime.now(),
+        result=TaskResult(TaskResultStatus.SUCCESSFUL, ["foo"]),
+        task_call_module=__name__,
+        task_call_func=name,
+    )
+
+
+@CELERY_APP.task(bind=True, base=MonitoredTask)
+def error_result_task(self: MonitoredTask):
+    """Task which sets an error result"""
+    try:
+        raise ValueError("error_result_task failed")
+    except ValueError as exc:
+        self.set_status(TaskResult(TaskResultStatus.ERROR).with_error(exc))
+
+
+@CELERY_APP.task(bind=True, base=MonitoredTask)
+def unsaved_error_result_task(self: MonitoredTask):
+    """Task which sets an error result, which isn't saved"""
+    self.save_on_success = False
+    try:
+        raise ValueError("unsaved_error_result_task failed")
+    except ValueError as exc:
+        self.set_status(TaskResult(TaskResultStatus.ERROR).with_error(exc))
+
+
+@CELERY_APP.task(bind=True, base=MonitoredTask)
+def failing_task(self: MonitoredTask, message: str):
+    """Task which raises an exception"""
+    raise ValueError(message)
+
+
+class TestMonitoredTasks(TestCase):
+    """Monitored task tests"""
+
+    def test_save(self):
+        """Test that saved tasks can be read and are listed in the index"""
+        task_info("test_save").save()
+        info = TaskInfo.by_name("test_save")
+        self.assertIsNotNone(info)
+        self.assertEqual(info.result.messages, ["foo"])
+        self.assertIn("task_test_save", TaskInfo._index_keys())
+        self.assertIn("task_test_save", TaskInfo.all())
+
+    def test_only_task_info(self):
+        """Test that values which aren't a TaskInfo are never returned as tasks"""
+        cache.set("task_not_a_task", True)
+        get_redis_connection().sadd(cache.make_key(TASK_INDEX_KEY), "task_not_a_task")
+        cache.add(TASK_INDEX_REBUILT_KEY, True, None)
+        self.assertIsNone(TaskInfo.by_name("not_a_task"))
+        tasks = TaskInfo.all()
+        self.assertNotIn("task_not_a_task", tasks)
+        for task in tasks.values():
+            self.assertIsInstance(task, TaskInfo)
+        self.assertNotIn("task_not_a_task", TaskInfo._index_keys())
+
+    def test_save_error(self):
+        """Test that the saved info of a failed task contains the traceback and message"""
+        error_result_task.delay()
+        info = TaskInfo.by_name("error_result_task")
+        self.assertEqual(info.result.status, TaskResultStatus.ERROR)
+        self.assertEqual(info.result.messages[-1], "error_result_task failed")
+        self.assertTrue(
+            any(
+                'raise ValueError("error_result_task failed")' in line
+                for line in info.result.messages
+            )
+        )
+        self.assertIsNone(info.result._error)
+
+    def test_unsaved_error(self):
+        """Test that the exception isn't kept on the task when the result isn't saved"""
+        unsaved_error_result_task.delay()
+        self.assertIsNone(TaskInfo.by_name("unsaved_error_result_task"))
+        self.assertIsNone(unsaved_error_result_task._result._error)
+
+    def test_failure_event_dedupe(self):
+        """Test that repeated identical failures only create a single event"""
+        prefix = generate_id()
+        failing_task.delay(f"{prefix} first")
+        failing_task.delay(f"{prefix} first")
+        events = Event.objects.filter(
+            action=EventAction.SYSTEM_TASK_EXCEPTION, context__message__icontains=prefix
+        )
+        self.assertEqual(events.count(), 1)
+        failing_task.delay(f"{prefix} second")
+        self.assertEqual(events.count(), 2)
+
+    def test_save_redis_error(self):
+        """Test that saving doesn't raise when redis is unreachable"""
+        connection = MagicMock()
+        connection.pipeline.return_value.execute.side_effect = RedisConnectionError()
+        with patch(
+            "authentik.events.monitored_tasks.get_redis_connection",
+            return_value=connection,
+        ):
+            task_info("test_save_redis_error").save()
+
+    def test_index_rebuild_once(self):
+        """Test that an empty index is only rebuilt from the keyspace once"""
+        cache.set(TASK_INDEX_REBUILT_KEY, True, None)
+        connection = MagicMock()
+        connection.smembers.return_value = set()
+        with patch(
+            "authentik.events.monitored_tasks.get_redis_connection",
+            return_value=connection,
+        ):
+            self.assertEqual(TaskInfo.all(), {})
+        connection.scan_iter.assert_not_called()
+
+    def test_index_redis_error(self):
+        """Test that tasks are listed as empty instead of raising when redis is unreachable"""
+        connection = MagicMock()
+        connection.smembers.side_effect = RedisConnectionError()
+        with patch(
+            "authentik.events.monitored_tasks.get_redis_connection",
+            return_value=connection,
+        ):
+            self.assertEqual(TaskInfo.all(), {})
@@ -1,7 +1,9 @@
 """Flow models"""
-from typing import TYPE_CHECKING, Optional, Type
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Optional, Type
 from uuid import uuid4
 
+from django.core.cache import cache
 from django.db import models
 from django.http import HttpRequest
 from django.utils.translation import gettext_lazy as _
@@ -11,12 +13,32 @@ from structlog.stdlib import get_logger
 
 from authentik.core.types import UserSettingSerializer
 from authentik.lib.models import InheritanceForeignKey, SerializerModel
+from authentik.lib.utils.http import get_client_ip
 from authentik.policies.models import PolicyBindingModel
 
 if TYPE_CHECKING:
     from authentik.flows.stage import StageView
 
 LOGGER = get_logger()
+# Short timeout, as this cache isn't invalidated when policies change
+FLOW_POLICY_CACHE_TIMEOUT = 30
+
+
+def flow_policy_cache_key(request: HttpRequest, flow_filter: dict[str, Any]) -> Optional[str]:
+    """Cache key where the pk of the first flow `request` can access is saved.
+
+    Policies can depend on more than the user, so the result is only shared by requests
+    of the same session and client IP. This is only used to pick a flow, the FlowPlanner
+    evaluates the policies of the picked flow again. Returns None for requests without
+    a saved session, as they can't be told apart."""
+    session_key = getattr(getattr(request, "session", None), "session_key", None)
+    if not session_key:
+        return None
+    prefix = (
+        f"goauthentik.io/flows/with_policy/{request.user.pk}_{session_key}_"
+        f"{get_client_ip(request)}"
+    )
+    return prefix + "_" + "_".join(f"{key}={value}" for key, value in sorted(flow_filter.items()))
 
 
 class NotConfiguredAction(models.TextChoices):
@@ -132,10 +154,10 @@ class Flow(SerializerModel, PolicyBindingModel):
         ),
     )
 
-    @property
+    @cached_property
     def background_url(self) -> str:
         """Get the URL to the background image. If the name is /static or starts with http
-        it is returned as-is"""
+        it is returned as-is. Cached per instance, as storage backends might sign the URL"""
         if not self.background:
             return "/static/dist/assets/images/flow_background.jpg"
         if self.background.name.startswith("http") or self.background.name.startswith("/static"):
@@ -155,6 +177,13 @@ class Flow(SerializerModel, PolicyBindingModel):
         """Get a Flow by `**flow_filter` and check if the request from `request` can access it."""
         from authentik.policies.engine import PolicyEngine
 
+        key = flow_policy_cache_key(request, flow_filter)
+        cached_pk = cache.get(key) if key else None
+        if cached_pk:
+            flow = Flow.objects.filter(pk=cached_pk, **flow_filter).first()
+            if flow:
+                LOGGER.debug("with_policy: flow passing (cached)", flow=flow)
+                return flow
         flows = Flow.objects.filter(**flow_filter).order_by("slug")
         for flow in flows:
             engine = PolicyEngine(flow, request.user, request)
@@ -162,6 +191,8 @@ class Flow(SerializerModel, PolicyBindingModel):
             result = engine.result
             if result.passing:
                 LOGGER.debug("with_policy: flow passing", flow=flow)
+                if key:
+                    cache.set(key, flow.pk, timeout=FLOW_POLICY_CACHE_TIMEOUT)
                 return flow
             LOGGER.warning("with_policy: flow not passing", flow=flow, messages=result.messages)
         LOGGER.debug("with_policy: no flow found", filters=flow_filter)
@@ -1,4 +1,6 @@
 """authentik stage Base view"""
+from functools import cached_property
+
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpRequest
 from django.http.request import QueryDict
@@ -99,22 +101,29 @@ class ChallengeStageView(StageView):
 
     def format_title(self) -> str:
         """Allow usage of placeholder in flow title."""
-        return self.executor.flow.title % {
-            "app": self.executor.plan.context.get(PLAN_CONTEXT_APPLICATION, "")
-        }
+        title = self.executor.flow.title
+        # Without any placeholders, formatting would return the title as-is
+        if "%" not in title:
+            return title
+        return title % {"app": self.executor.plan.context.get(PLAN_CONTEXT_APPLICATION, "")}
+
+    @cached_property
+    def _flow_info_data(self) -> dict:
+        """Validated flow info, which is the same for every challenge of this stage view"""
+        flow_info = ContextualFlowInfo(
+            data={
+                "title": self.format_title(),
+                "background": self.executor.flow.background_url,
+                "cancel_url": reverse("authentik_flows:cancel"),
+            }
+        )
+        flow_info.is_valid()
+        return flow_info.data
 
     def _get_challenge(self, *args, **kwargs) -> Challenge:
         challenge = self.get_challenge(*args, **kwargs)
         if "flow_info" not in challenge.initial_data:
-            flow_info = ContextualFlowInfo(
-                data={
-                    "title": self.format_title(),
-                    "background": self.executor.flow.background_url,
-                    "cancel_url": reverse("authentik_flows:cancel"),
-                }
-            )
-            flow_info.is_valid()
-            challenge.initial_data["flow_info"] = flow_info.data
+            challenge.initial_data["flow_info"] = self._flow_info_data
         if isinstance(challenge, WithUserInfoChallenge):
             # If there's a pending user, update the `username` field
             # this field is only used by password managers.
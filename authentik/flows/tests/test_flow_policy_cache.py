@@ -0,0 +1,92 @@
+"""Flow.with_policy cache tests"""
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from guardian.shortcuts import get_anonymous_user
+
+from authentik.flows.models import Flow, FlowDesignation
+from authentik.lib.generators import generate_id
+from authentik.lib.tests.utils import dummy_get_response, get_request
+from authentik.policies.types import PolicyResult
+
+
+class TestFlowPolicyCache(TestCase):
+    """Flow.with_policy cache tests"""
+
+    def setUp(self):
+        self.prefix = generate_id().lower()
+        self.flow_a = Flow.objects.create(
+            name=f"{self.prefix}-a",
+            slug=f"{self.prefix}-a",
+            designation=FlowDesignation.STAGE_CONFIGURATION,
+        )
+        self.flow_b = Flow.objects.create(
+            name=f"{self.prefix}-b",
+            slug=f"{self.prefix}-b",
+            designation=FlowDesignation.STAGE_CONFIGURATION,
+        )
+        self.flow_filter = {
+            "designation": FlowDesignation.STAGE_CONFIGURATION,
+            "slug__startswith": self.prefix,
+        }
+
+    def test_cache_hit(self):
+        """Test that policies aren't evaluated again for the same session"""
+        request = get_request("/")
+        build = MagicMock()
+        with patch("authentik.policies.engine.PolicyEngine.build", build), patch(
+            "authentik.policies.engine.PolicyEngine.result",
+            PropertyMock(return_value=PolicyResult(True)),
+        ):
+            self.assertEqual(Flow.with_policy(request, **self.flow_filter), self.flow_a)
+            self.assertEqual(Flow.with_policy(request, **self.flow_filter), self.flow_a)
+        self.assertEqual(build.call_count, 1)
+
+    def test_cache_key_namespace(self):
+        """Test that cached flows aren't counted or cleared as cached flow plans or policies"""
+        request = get_request("/")
+        with patch("authentik.policies.engine.PolicyEngine.build", MagicMock()), patch(
+            "authentik.policies.engine.PolicyEngine.result",
+            PropertyMock(return_value=PolicyResult(True)),
+        ):
+            Flow.with_policy(request, **self.flow_filter)
+        session_key = request.session.session_key
+        for pattern in ("flow_*", "policy_*"):
+            self.assertFalse(any(session_key in key for key in cache.keys(pattern)))
+
+    def test_cache_miss_filter(self):
+        """Test that a cached flow which doesn't match the filter anymore isn't used"""
+        request = get_request("/")
+        build = MagicMock()
+        with patch("authentik.policies.engine.PolicyEngine.build", build), patch(
+            "authentik.policies.engine.PolicyEngine.result",
+            PropertyMock(return_value=PolicyResult(True)),
+        ):
+            self.assertEqual(Flow.with_policy(request, **self.flow_filter), self.flow_a)
+            self.flow_a.designation = FlowDesignation.ENROLLMENT
+            self.flow_a.save()
+            self.assertEqual(Flow.with_policy(request, **self.flow_filter), self.flow_b)
+        self.assertEqual(build.call_count, 2)
+
+    def test_no_session(self):
+        """Test that requests without a saved session don't share a cached flow"""
+
+        def sessionless_request():
+            request = RequestFactory().get("/")
+            request.user = get_anonymous_user()
+            SessionMiddleware(dummy_get_response).process_request(request)
+            return request
+
+        with patch("authentik.policies.engine.PolicyEngine.build", MagicMock()), patch(
+            "authentik.policies.engine.PolicyEngine.result",
+            # First request passes flow a, second request only passes flow b
+            PropertyMock(side_effect=[PolicyResult(True), PolicyResult(False), PolicyResult(True)]),
+        ):
+            self.assertEqual(
+                Flow.with_policy(sessionless_request(), **self.flow_filter), self.flow_a
+            )
+            self.assertEqual(
+                Flow.with_policy(sessionless_request(), **self.flow_filter), self.flow_b
+            )
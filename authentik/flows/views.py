@@ -112,6 +112,7 @@ class FlowExecutorView(APIView):
     current_binding: FlowStageBinding
     current_stage: Stage
     current_stage_view: View
+    current_stage_view_path: str
 
     _logger: BoundLogger
 
@@ -186,6 +187,7 @@ class FlowExecutorView(APIView):
             self._logger.debug("Error getting stage type", exc=exc)
             return self.stage_invalid()
         self.current_stage_view = stage_cls(self)
+        self.current_stage_view_path = class_to_path(stage_cls)
         self.current_stage_view.args = self.args
         self.current_stage_view.kwargs = self.kwargs
         self.current_stage_view.request = request
@@ -233,7 +235,7 @@ class FlowExecutorView(APIView):
         """Get the next pending challenge from the currently active flow."""
         self._logger.debug(
             "f(exec): Passing GET",
-            view_class=class_to_path(self.current_stage_view.__class__),
+            view_class=self.current_stage_view_path,
             stage=self.current_stage,
         )
         try:
@@ -270,7 +272,7 @@ class FlowExecutorView(APIView):
         """Solve the previously retrieved challenge and advanced to the next stage."""
         self._logger.debug(
             "f(exec): Passing POST",
-            view_class=class_to_path(self.current_stage_view.__class__),
+            view_class=self.current_stage_view_path,
             stage=self.current_stage,
         )
         try:
@@ -327,7 +329,7 @@ class FlowExecutorView(APIView):
         Persists updated plan and context to session."""
         self._logger.debug(
             "f(exec): Stage ok",
-            stage_class=class_to_path(self.current_stage_view.__class__),
+            stage_class=self.current_stage_view_path,
         )
         self.plan.pop()
         self.request.session[SESSION_KEY_PLAN] = self.plan
@@ -378,8 +380,7 @@ class FlowExecutorView(APIView):
             SESSION_KEY_GET,
         ]
         for key in keys_to_delete:
-            if key in self.request.session:
-                del self.request.session[key]
+            self.request.session.pop(key, None)
 
 
 class FlowErrorResponse(TemplateResponse):
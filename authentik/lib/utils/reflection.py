@@ -1,4 +1,5 @@
 """authentik lib reflection utilities"""
+from functools import lru_cache
 from importlib import import_module
 
 from django.conf import settings
@@ -24,6 +25,7 @@ def class_to_path(cls):
     return f"{cls.__module__}.{cls.__name__}"
 
 
+@lru_cache(maxsize=256)
 def path_to_class(path):
     """Import module and return class"""
     if not path:
@@ -1,6 +1,8 @@
 """managed Settings"""
 from celery.schedules import crontab
 
+__all__ = ["CELERY_BEAT_SCHEDULE"]
+
 CELERY_BEAT_SCHEDULE = {
     "managed_reconcile": {
         "task": "authentik.managed.tasks.managed_reconcile",
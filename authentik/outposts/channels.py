@@ -1,11 +1,13 @@
 """Outpost websocket handler"""
-from dataclasses import asdict, dataclass, field
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import IntEnum
+from json import dumps
+from time import monotonic
 from typing import Any, Optional
 
 from channels.exceptions import DenyConnection
-from dacite import from_dict
 from dacite.data import Data
 from guardian.shortcuts import get_objects_for_user
 from prometheus_client import Gauge
@@ -15,13 +17,21 @@ from authentik.core.channels import AuthJsonConsumer
 from authentik.outposts.models import OUTPOST_HELLO_INTERVAL, Outpost, OutpostState
 
 GAUGE_OUTPOSTS_CONNECTED = Gauge(
-    "authentik_outposts_connected", "Currently connected outposts", ["outpost", "uid"]
+    "authentik_outposts_connected", "Currently connected outposts", ["outpost"]
 )
 GAUGE_OUTPOSTS_LAST_UPDATE = Gauge(
     "authentik_outposts_last_update",
     "Last update from any outpost",
-    ["outpost", "uid", "version"],
+    ["outpost"],
 )
+GAUGE_OUTPOSTS_INFO = Gauge(
+    "authentik_outposts_info",
+    "Versions reported by outposts",
+    ["outpost", "version"],
+)
+# Connections per (outpost, version) in this process, so the info series of a version
+# is only removed once no connected instance reports it anymore
+_CONNECTED_VERSIONS: Counter[tuple[str, str]] = Counter()
 
 LOGGER = get_logger()
 
@@ -39,6 +49,11 @@ class WebsocketMessageInstruction(IntEnum):
     TRIGGER_UPDATE = 2
 
 
+# Static messages are serialized once, instead of on every send
+ACK_JSON = dumps({"instruction": WebsocketMessageInstruction.ACK, "args": {}})
+TRIGGER_UPDATE_JSON = dumps({"instruction": WebsocketMessageInstruction.TRIGGER_UPDATE, "args": {}})
+
+
 @dataclass
 class WebsocketMessage:
     """Complete Websocket Message that is being sent"""
@@ -56,6 +71,12 @@ class OutpostConsumer(AuthJsonConsumer):
 
     first_msg = False
 
+    # Monotonic time the instance state was last saved at
+    last_saved: float = 0.0
+
+    # Version last reported by this connection, for GAUGE_OUTPOSTS_INFO
+    last_version: Optional[str] = None
+
     def connect(self):
         super().connect()
         uuid = self.scope["url_route"]["kwargs"]["pk"]
@@ -71,12 +92,12 @@ class OutpostConsumer(AuthJsonConsumer):
         if self.outpost and self.last_uid:
             state = OutpostState.for_instance_uid(self.outpost, self.last_uid)
             if self.channel_name in state.channel_ids:
-                state.channel_ids.remove(self.channel_name)
+                state.channel_ids.discard(self.channel_name)
                 state.save()
-            GAUGE_OUTPOSTS_CONNECTED.labels(
-                outpost=self.outpost.name,
-                uid=self.last_uid,
-            ).dec()
+            # Only connections which have sent a message have been counted
+            if self.first_msg:
+                GAUGE_OUTPOSTS_CONNECTED.labels(outpost=self.outpost.name).dec()
+            self.set_version_info(None)
         LOGGER.debug(
             "removed outpost instance from cache",
             outpost=self.outpost,
@@ -84,23 +105,16 @@ class OutpostConsumer(AuthJsonConsumer):
         )
 
     def receive_json(self, content: Data):
-        msg = from_dict(WebsocketMessage, content)
+        msg = WebsocketMessage(instruction=content["instruction"], args=content.get("args") or {})
         uid = msg.args.get("uuid", self.channel_name)
+        uid_changed = uid != self.last_uid
         self.last_uid = uid
 
         if not self.outpost:
             raise DenyConnection()
 
-        state = OutpostState.for_instance_uid(self.outpost, uid)
-        if self.channel_name not in state.channel_ids:
-            state.channel_ids.append(self.channel_name)
-        state.last_seen = datetime.now()
-
         if not self.first_msg:
-            GAUGE_OUTPOSTS_CONNECTED.labels(
-                outpost=self.outpost.name,
-                uid=self.last_uid,
-            ).inc()
+            GAUGE_OUTPOSTS_CONNECTED.labels(outpost=self.outpost.name).inc()
             LOGGER.debug(
                 "added outpost instace to cache",
                 outpost=self.outpost,
@@ -108,24 +122,53 @@ class OutpostConsumer(AuthJsonConsumer):
             )
             self.first_msg = True
 
+        # ACKs don't change the state, so don't load it from the cache
+        if msg.instruction == WebsocketMessageInstruction.ACK:
+            return
+
+        # The state only needs to be refreshed about once per hello interval, so
+        # don't write to the cache for every message in a burst
+        now = monotonic()
+        if (
+            self.last_saved
+            and not uid_changed
+            and now - self.last_saved < OUTPOST_HELLO_INTERVAL / 2
+        ):
+            self.send(text_data=ACK_JSON)
+            return
+
+        state = OutpostState.for_instance_uid(self.outpost, uid)
+        state.channel_ids.add(self.channel_name)
+        state.last_seen = datetime.now()
+
         if msg.instruction == WebsocketMessageInstruction.HELLO:
             state.version = msg.args.get("version", None)
             state.build_hash = msg.args.get("buildHash", "")
-        elif msg.instruction == WebsocketMessageInstruction.ACK:
-            return
-        GAUGE_OUTPOSTS_LAST_UPDATE.labels(
-            outpost=self.outpost.name,
-            uid=self.last_uid or "",
-            version=state.version or "",
-        ).set_to_current_time()
+            self.set_version_info(state.version or "")
+        GAUGE_OUTPOSTS_LAST_UPDATE.labels(outpost=self.outpost.name).set_to_current_time()
         state.save(timeout=OUTPOST_HELLO_INTERVAL * 1.5)
+        self.last_saved = now
+
+        self.send(text_data=ACK_JSON)
 
-        response = WebsocketMessage(instruction=WebsocketMessageInstruction.ACK)
-        self.send_json(asdict(response))
+    def set_version_info(self, version: Optional[str]):
+        """Report `version` for this connection in GAUGE_OUTPOSTS_INFO, and remove the series
+        of the previously reported version if no other connection reports it. `None` only
+        removes the previous version."""
+        if version == self.last_version:
+            return
+        if self.last_version is not None:
+            previous = (self.outpost.name, self.last_version)
+            _CONNECTED_VERSIONS[previous] -= 1
+            if _CONNECTED_VERSIONS[previous] <= 0:
+                del _CONNECTED_VERSIONS[previous]
+                GAUGE_OUTPOSTS_INFO.remove(*previous)
+        if version is not None:
+            _CONNECTED_VERSIONS[(self.outpost.name, version)] += 1
+            GAUGE_OUTPOSTS_INFO.labels(outpost=self.outpost.name, version=version).set(1)
+        self.last_version = version
 
     # pylint: disable=unused-argument
     def event_update(self, event):
         """Event handler which is called by post_save signals, Send update instruction"""
-        self.send_json(
-            asdict(WebsocketMessage(instruction=WebsocketMessageInstruction.TRIGGER_UPDATE))
-        )
+        self.send(text_data=TRIGGER_UPDATE_JSON)
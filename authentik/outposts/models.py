@@ -1,8 +1,8 @@
 """Outpost models"""
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from datetime import datetime
 from os import environ
-from typing import Iterable, Optional, Union
+from typing import Any, Iterable, Optional, Union
 from uuid import uuid4
 
 from dacite import from_dict
@@ -447,7 +447,7 @@ class OutpostState:
     """Outpost instance state, last_seen and version"""
 
     uid: str
-    channel_ids: list[str] = field(default_factory=list)
+    channel_ids: set[str] = field(default_factory=set)
     last_seen: Optional[datetime] = field(default=None)
     version: Optional[str] = field(default=None)
     version_should: Union[Version, LegacyVersion] = field(default=OUR_VERSION)
@@ -468,21 +468,31 @@ class OutpostState:
     def for_outpost(outpost: Outpost) -> list["OutpostState"]:
         """Get all states for an outpost"""
         keys = cache.keys(f"{outpost.state_cache_prefix}_*")
+        if not keys:
+            return []
         states = []
-        for key in keys:
+        for key, data in cache.get_many(keys).items():
             instance_uid = key.replace(f"{outpost.state_cache_prefix}_", "")
-            states.append(OutpostState.for_instance_uid(outpost, instance_uid))
+            states.append(OutpostState._from_cache(outpost, key, instance_uid, data))
         return states
 
     @staticmethod
     def for_instance_uid(outpost: Outpost, uid: str) -> "OutpostState":
         """Get state for a single instance"""
         key = f"{outpost.state_cache_prefix}_{uid}"
-        default_data = {"uid": uid, "channel_ids": []}
-        data = cache.get(key, default_data)
+        return OutpostState._from_cache(outpost, key, uid, cache.get(key))
+
+    @staticmethod
+    def _from_cache(outpost: Outpost, key: str, uid: str, data: Any) -> "OutpostState":
+        """Build state from cached data, falling back to an empty state"""
+        default_data = {"uid": uid, "channel_ids": set()}
+        if data is None:
+            data = default_data
         if isinstance(data, str):
             cache.delete(key)
             data = default_data
+        # States saved by older versions have channel_ids as list
+        data["channel_ids"] = set(data.get("channel_ids", ()))
         state = from_dict(OutpostState, data)
         # pylint: disable=protected-access
         state._outpost = outpost
@@ -491,7 +501,10 @@ class OutpostState:
     def save(self, timeout=OUTPOST_HELLO_INTERVAL):
         """Save current state to cache"""
         full_key = f"{self._outpost.state_cache_prefix}_{self.uid}"
-        return cache.set(full_key, asdict(self), timeout=timeout)
+        # Don't copy and pickle the entire outpost, it's set again when loading
+        data = asdict(replace(self, _outpost=None))
+        data.pop("_outpost")
+        return cache.set(full_key, data, timeout=timeout)
 
     def delete(self):
         """Manually delete from cache, used on channel disconnect"""
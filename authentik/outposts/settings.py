@@ -1,6 +1,8 @@
 """Outposts Settings"""
 from celery.schedules import crontab
 
+__all__ = ["CELERY_BEAT_SCHEDULE"]
+
 CELERY_BEAT_SCHEDULE = {
     "outposts_controller": {
         "task": "authentik.outposts.tasks.outpost_controller_all",
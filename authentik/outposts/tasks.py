@@ -236,7 +236,7 @@ def outpost_local_connection():
     socket = Path(unix_socket_path)
     if socket.exists() and access(socket, R_OK):
         LOGGER.debug("Detected local docker socket")
-        if len(DockerServiceConnection.objects.filter(local=True)) == 0:
+        if not DockerServiceConnection.objects.filter(local=True).exists():
             LOGGER.debug("Created Service Connection for docker")
             DockerServiceConnection.objects.create(
                 name="Local Docker connection",
@@ -0,0 +1,88 @@
+"""Websocket tests"""
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from prometheus_client import REGISTRY
+
+from authentik.lib.generators import generate_id
+from authentik.outposts.channels import ACK_JSON, OutpostConsumer, WebsocketMessageInstruction
+from authentik.outposts.models import Outpost, OutpostType
+
+
+class TestOutpostWS(TestCase):
+    """Websocket tests"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.outpost: Outpost = Outpost.objects.create(
+            name=generate_id(),
+            type=OutpostType.PROXY,
+        )
+
+    def consumer(self) -> OutpostConsumer:
+        """Create a consumer for the outpost, which is connected"""
+        consumer = OutpostConsumer()
+        consumer.outpost = self.outpost
+        consumer.channel_name = generate_id()
+        consumer.last_uid = consumer.channel_name
+        consumer.send = MagicMock()
+        return consumer
+
+    def hello(self, consumer: OutpostConsumer, uid: str, version: str):
+        """Send a HELLO message to `consumer`"""
+        consumer.receive_json(
+            {
+                "instruction": WebsocketMessageInstruction.HELLO,
+                "args": {"uuid": uid, "version": version},
+            }
+        )
+
+    def version_info(self, version: str):
+        """Get the value of the version info metric of the outpost"""
+        return REGISTRY.get_sample_value(
+            "authentik_outposts_info", {"outpost": self.outpost.name, "version": version}
+        )
+
+    def test_hello_debounce(self):
+        """Test that repeated HELLOs within half the hello interval don't rewrite the state"""
+        consumer = self.consumer()
+        with patch("authentik.outposts.models.OutpostState.save") as save:
+            self.hello(consumer, "a", "1.0")
+            self.assertEqual(save.call_count, 1)
+            self.hello(consumer, "a", "1.0")
+            self.assertEqual(save.call_count, 1)
+            # Every HELLO is acknowledged, even when the state isn't saved
+            self.assertEqual(consumer.send.call_count, 2)
+            consumer.send.assert_called_with(text_data=ACK_JSON)
+
+    def test_hello_uid_changed(self):
+        """Test that a HELLO from a different instance UID is saved immediately"""
+        consumer = self.consumer()
+        with patch("authentik.outposts.models.OutpostState.save") as save:
+            self.hello(consumer, "a", "1.0")
+            self.hello(consumer, "b", "1.0")
+            self.assertEqual(save.call_count, 2)
+
+    def test_ack(self):
+        """Test that ACKs don't save the state and aren't acknowledged"""
+        consumer = self.consumer()
+        with patch("authentik.outposts.models.OutpostState.save") as save:
+            consumer.receive_json({"instruction": WebsocketMessageInstruction.ACK})
+            save.assert_not_called()
+            consumer.send.assert_not_called()
+
+    def test_version_info(self):
+        """Test that the version info of a previous version is removed"""
+        consumer = self.consumer()
+        other = self.consumer()
+        self.hello(consumer, "a", "1.0")
+        self.hello(other, "b", "1.0")
+        self.assertEqual(self.version_info("1.0"), 1)
+        # Instance a is upgraded, while b still reports the old version
+        self.hello(consumer, "a-upgraded", "2.0")
+        self.assertEqual(self.version_info("1.0"), 1)
+        self.assertEqual(self.version_info("2.0"), 1)
+        other.disconnect(1000)
+        self.assertIsNone(self.version_info("1.0"))
+        consumer.disconnect(1000)
+        self.assertIsNone(self.version_info("2.0"))
@@ -1,4 +1,5 @@
 """authentik policy engine"""
+from itertools import chain
 from multiprocessing import Pipe, current_process
 from multiprocessing.connection import Connection
 from typing import Iterator, Optional
@@ -138,8 +139,8 @@ class PolicyEngine:
     @property
     def result(self) -> PolicyResult:
         """Get policy-checking result"""
-        process_results: list[PolicyResult] = [x.result for x in self.__processes if x.result]
-        all_results = list(process_results + self.__cached_policies)
+        all_results: list[PolicyResult] = [x.result for x in self.__processes if x.result]
+        all_results.extend(self.__cached_policies)
         if len(all_results) < self.__expected_result_count:  # pragma: no cover
             raise AssertionError("Got less results than polices")
         # No results, no policies attached -> passing
@@ -152,7 +153,7 @@ class PolicyEngine:
             passing = any(x.passing for x in all_results)
         result = PolicyResult(passing)
         result.source_results = all_results
-        result.messages = tuple(y for x in all_results for y in x.messages)
+        result.messages = tuple(chain.from_iterable(x.messages for x in all_results))
         return result
 
     @property
@@ -1,6 +1,8 @@
 """Reputation Settings"""
 from celery.schedules import crontab
 
+__all__ = ["CELERY_BEAT_SCHEDULE"]
+
 CELERY_BEAT_SCHEDULE = {
     "policies_reputation_ip_save": {
         "task": "authentik.policies.reputation.tasks.save_ip_reputation",
@@ -0,0 +1,65 @@
+"""policy types tests"""
+from copyreg import _reconstructor
+from pickle import dumps, loads  # nosec
+
+from django.test import TestCase
+
+from authentik.policies.types import PolicyResult
+
+
+class CachedPolicyResult:
+    """Pickles to a PolicyResult with `state`, the same as results cached by older versions"""
+
+    def __init__(self, state):
+        self.state = state
+
+    def __reduce__(self):
+        return (_reconstructor, (PolicyResult, object, None), self.state)
+
+
+class TestPolicyResult(TestCase):
+    """PolicyResult tests"""
+
+    def assert_result(self, result: PolicyResult):
+        """Check that `result` was restored correctly"""
+        self.assertIsInstance(result, PolicyResult)
+        self.assertTrue(result.passing)
+        self.assertEqual(result.messages, ("foo",))
+        self.assertIsNone(result.source_binding)
+        self.assertEqual(result.source_results, [])
+
+    def test_pickle(self):
+        """Test pickling and unpickling a result"""
+        result = PolicyResult(True, "foo")
+        self.assert_result(loads(dumps(result)))  # nosec
+
+    def test_unpickle_dict_state(self):
+        """Test unpickling a result that was pickled before __slots__ were added"""
+        payload = dumps(
+            CachedPolicyResult(
+                {
+                    "passing": True,
+                    "messages": ("foo",),
+                    "source_binding": None,
+                    "source_results": [],
+                }
+            )
+        )
+        self.assert_result(loads(payload))  # nosec
+
+    def test_unpickle_slots_state(self):
+        """Test unpickling a result with the (None, slots) state pickle uses for slotted objects"""
+        payload = dumps(
+            CachedPolicyResult(
+                (
+                    None,
+                    {
+                        "passing": True,
+                        "messages": ("foo",),
+                        "source_binding": None,
+                        "source_results": [],
+                    },
+                )
+            )
+        )
+        self.assert_result(loads(payload))  # nosec
@@ -22,11 +22,13 @@ LOGGER = get_logger()
 class PolicyRequest:
     """Data-class to hold policy request data"""
 
+    __slots__ = ("user", "http_request", "obj", "context", "debug")
+
     user: User
     http_request: Optional[HttpRequest]
     obj: Optional[Model]
     context: dict[str, Any]
-    debug: bool = False
+    debug: bool
 
     def __init__(self, user: User):
         super().__init__()
@@ -34,6 +36,7 @@ class PolicyRequest:
         self.http_request = None
         self.obj = None
         self.context = {}
+        self.debug = False
 
     def set_http_request(self, request: HttpRequest):  # pragma: no cover
         """Load data from HTTP request, including geoip when enabled"""
@@ -61,6 +64,8 @@ class PolicyRequest:
 class PolicyResult:
     """Small data-class to hold policy results"""
 
+    __slots__ = ("passing", "messages", "source_binding", "source_results")
+
     passing: bool
     messages: tuple[str, ...]
 
@@ -74,6 +79,13 @@ class PolicyResult:
         self.source_binding = None
         self.source_results = []
 
+    def __setstate__(self, state):
+        # Results cached before __slots__ was added were pickled with a plain dict
+        if isinstance(state, tuple):
+            _, state = state
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def __repr__(self):
         return self.__str__()
 
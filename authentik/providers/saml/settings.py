@@ -1,5 +1,7 @@
 """saml provider settings"""
 
+__all__ = ["AUTHENTIK_PROVIDERS_SAML_PROCESSORS"]
+
 AUTHENTIK_PROVIDERS_SAML_PROCESSORS = [
     "authentik.providers.saml.processors.generic",
     "authentik.providers.saml.processors.salesforce",
@@ -18,6 +18,7 @@ CELERY_APP = Celery("authentik")
 @setup_logging.connect
 def config_loggers(*args, **kwags):
     """Apply logging settings from settings.py to celery"""
+    # structlog is configured by django.setup(), through LOGGING_CONFIG
     dictConfig(settings.LOGGING)
 
 
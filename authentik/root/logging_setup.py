@@ -0,0 +1,34 @@
+"""authentik logging setup"""
+import logging
+from logging.config import dictConfig
+
+import structlog
+from django.conf import settings
+
+from authentik.core.middleware import structlog_add_request_id
+from authentik.lib.logging import add_process_id
+
+
+def configure(config: dict):
+    """Configure structlog and apply the logging config `config`. Set as LOGGING_CONFIG,
+    so this is called by django.setup() instead of when settings are imported."""
+    structlog.configure_once(
+        processors=[
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            structlog.threadlocal.merge_threadlocal_context,
+            add_process_id,
+            structlog_add_request_id,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso", utc=False),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.make_filtering_bound_logger(
+            getattr(logging, settings.LOG_LEVEL, logging.WARNING)
+        ),
+        cache_logger_on_first_use=True,
+    )
+    dictConfig(config)
@@ -11,26 +11,18 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import importlib
-import logging
 import os
 import sys
 from json import dumps
+from pathlib import Path
 from tempfile import gettempdir
 from time import time
 
 import structlog
 from celery.schedules import crontab
-from kubernetes.config.incluster_config import SERVICE_HOST_ENV_NAME
-from sentry_sdk import init as sentry_init
-from sentry_sdk.api import set_tag
-from sentry_sdk.integrations.celery import CeleryIntegration
-from sentry_sdk.integrations.django import DjangoIntegration
-from sentry_sdk.integrations.redis import RedisIntegration
 
 from authentik import ENV_GIT_HASH_KEY, __version__
-from authentik.core.middleware import structlog_add_request_id
 from authentik.lib.config import CONFIG
-from authentik.lib.logging import add_process_id
 from authentik.lib.sentry import before_send
 from authentik.stages.password import BACKEND_APP_PASSWORD, BACKEND_INBUILT, BACKEND_LDAP
 
@@ -51,10 +43,11 @@ def j_print(event: str, log_level: str = "info", **kwargs):
 LOGGER = structlog.get_logger()
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-STATIC_ROOT = BASE_DIR + "/static"
-STATICFILES_DIRS = [BASE_DIR + "/web"]
-MEDIA_ROOT = BASE_DIR + "/media"
+_BASE = Path(__file__).resolve().parents[2]
+BASE_DIR = str(_BASE)
+STATIC_ROOT = str(_BASE / "static")
+STATICFILES_DIRS = [str(_BASE / "web")]
+MEDIA_ROOT = str(_BASE / "media")
 
 DEBUG = CONFIG.y_bool("debug")
 SECRET_KEY = CONFIG.y("secret_key")
@@ -89,6 +82,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    # Required for `{% load humanize %}` (naturaltime) in the email stage templates
     "django.contrib.humanize",
     "authentik.admin",
     "authentik.api",
@@ -195,17 +189,30 @@ REDIS_CELERY_TLS_REQUIREMENTS = ""
 if CONFIG.y_bool("redis.tls", False):
     REDIS_PROTOCOL_PREFIX = "rediss://"
     REDIS_CELERY_TLS_REQUIREMENTS = f"?ssl_cert_reqs={CONFIG.y('redis.tls_reqs')}"
+_REDIS_BASE_URL = (
+    f"{REDIS_PROTOCOL_PREFIX}:"
+    f"{CONFIG.y('redis.password')}@{CONFIG.y('redis.host')}:"
+    f"{int(CONFIG.y('redis.port'))}"
+)
+
+
+def _redis_url(database: str) -> str:
+    """Build URL to a redis database, with host and credentials from config"""
+    return f"{_REDIS_BASE_URL}/{CONFIG.y(f'redis.{database}')}"
+
 
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": (
-            f"{REDIS_PROTOCOL_PREFIX}:"
-            f"{CONFIG.y('redis.password')}@{CONFIG.y('redis.host')}:"
-            f"{int(CONFIG.y('redis.port'))}/{CONFIG.y('redis.cache_db')}"
-        ),
+        "LOCATION": _redis_url("cache_db"),
         "TIMEOUT": int(CONFIG.y("redis.cache_timeout", 300)),
-        "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CONNECTION_POOL_KWARGS": {
+                "socket_keepalive": True,
+                "retry_on_timeout": True,
+            },
+        },
     }
 }
 DJANGO_REDIS_IGNORE_EXCEPTIONS = True
@@ -221,14 +228,14 @@ MESSAGE_STORAGE = "authentik.root.messages.storage.ChannelsStorage"
 
 MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "django.middleware.security.SecurityMiddleware",
     "authentik.root.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "authentik.core.middleware.RequestIDMiddleware",
     "authentik.tenants.middleware.TenantMiddleware",
     "authentik.events.middleware.AuditMiddleware",
-    "django.middleware.security.SecurityMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "authentik.core.middleware.ImpersonateMiddleware",
@@ -260,11 +267,7 @@ CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [
-                f"{REDIS_PROTOCOL_PREFIX}:"
-                f"{CONFIG.y('redis.password')}@{CONFIG.y('redis.host')}:"
-                f"{int(CONFIG.y('redis.port'))}/{CONFIG.y('redis.ws_db')}"
-            ],
+            "hosts": [_redis_url("ws_db")],
         },
     },
 }
@@ -340,18 +343,13 @@ CELERY_BEAT_SCHEDULE = {
 }
 CELERY_TASK_CREATE_MISSING_QUEUES = True
 CELERY_TASK_DEFAULT_QUEUE = "authentik"
-CELERY_BROKER_URL = (
-    f"{REDIS_PROTOCOL_PREFIX}:"
-    f"{CONFIG.y('redis.password')}@{CONFIG.y('redis.host')}:"
-    f"{int(CONFIG.y('redis.port'))}/{CONFIG.y('redis.message_queue_db')}"
-    f"{REDIS_CELERY_TLS_REQUIREMENTS}"
-)
-CELERY_RESULT_BACKEND = (
-    f"{REDIS_PROTOCOL_PREFIX}:"
-    f"{CONFIG.y('redis.password')}@{CONFIG.y('redis.host')}:"
-    f"{int(CONFIG.y('redis.port'))}/{CONFIG.y('redis.message_queue_db')}"
-    f"{REDIS_CELERY_TLS_REQUIREMENTS}"
-)
+# Task arguments are stored with the task's result in cache and re-used for retries,
+# so only accept plain JSON payloads
+CELERY_TASK_SERIALIZER = "json"
+CELERY_RESULT_SERIALIZER = "json"
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_BROKER_URL = f"{_redis_url('message_queue_db')}{REDIS_CELERY_TLS_REQUIREMENTS}"
+CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 
 # Database backup
 DBBACKUP_STORAGE = "django.core.files.storage.FileSystemStorage"
@@ -361,26 +359,36 @@ DBBACKUP_CONNECTOR_MAPPING = {
     "django_prometheus.db.backends.postgresql": "dbbackup.db.postgresql.PgDumpConnector",
 }
 DBBACKUP_TMP_DIR = gettempdir() if DEBUG else "/tmp"  # nosec
-if CONFIG.y("postgresql.s3_backup"):
+# The storage class is only imported by dbbackup once a backup or restore runs
+_S3_BACKUP = CONFIG.y("postgresql.s3_backup")
+if _S3_BACKUP:
     DBBACKUP_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
     DBBACKUP_STORAGE_OPTIONS = {
-        "access_key": CONFIG.y("postgresql.s3_backup.access_key"),
-        "secret_key": CONFIG.y("postgresql.s3_backup.secret_key"),
-        "bucket_name": CONFIG.y("postgresql.s3_backup.bucket"),
-        "region_name": CONFIG.y("postgresql.s3_backup.region", "eu-central-1"),
+        "access_key": _S3_BACKUP.get("access_key"),
+        "secret_key": _S3_BACKUP.get("secret_key"),
+        "bucket_name": _S3_BACKUP.get("bucket"),
+        "region_name": _S3_BACKUP.get("region", "eu-central-1"),
         "default_acl": "private",
-        "endpoint_url": CONFIG.y("postgresql.s3_backup.host"),
-        "location": CONFIG.y("postgresql.s3_backup.location", ""),
+        "endpoint_url": _S3_BACKUP.get("host"),
+        "location": _S3_BACKUP.get("location", ""),
     }
     j_print(
         "Database backup to S3 is configured",
-        host=CONFIG.y("postgresql.s3_backup.host"),
+        host=DBBACKUP_STORAGE_OPTIONS["endpoint_url"],
     )
 
 # Sentry integration
 SENTRY_DSN = "https://a579bb09306d4f8b8d8847c052d3a1d3@sentry.beryju.org/8"
 _ERROR_REPORTING = CONFIG.y_bool("error_reporting.enabled", False)
 if _ERROR_REPORTING:
+    # Only import sentry, its integrations and kubernetes when they are used
+    from kubernetes.config.incluster_config import SERVICE_HOST_ENV_NAME
+    from sentry_sdk import init as sentry_init
+    from sentry_sdk.api import set_tag
+    from sentry_sdk.integrations.celery import CeleryIntegration
+    from sentry_sdk.integrations.django import DjangoIntegration
+    from sentry_sdk.integrations.redis import RedisIntegration
+
     # pylint: disable=abstract-class-instantiated
     sentry_init(
         dsn=SENTRY_DSN,
@@ -419,25 +427,8 @@ TEST_RUNNER = "authentik.root.test_runner.PytestTestRunner"
 # We can't check TEST here as its set later by the test runner
 LOG_LEVEL = CONFIG.y("log_level").upper() if "TF_BUILD" not in os.environ else "DEBUG"
 
-structlog.configure_once(
-    processors=[
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.add_logger_name,
-        structlog.threadlocal.merge_threadlocal_context,
-        add_process_id,
-        structlog_add_request_id,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso", utc=False),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
-    ],
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.make_filtering_bound_logger(
-        getattr(logging, LOG_LEVEL, logging.WARNING)
-    ),
-    cache_logger_on_first_use=True,
-)
+# structlog is configured together with LOGGING once django is set up
+LOGGING_CONFIG = "authentik.root.logging_setup.configure"
 
 LOG_PRE_CHAIN = [
     # Add the log level and a timestamp to the event_dict if the log entry
@@ -449,6 +440,24 @@ LOG_PRE_CHAIN = [
     structlog.processors.format_exc_info,
 ]
 
+_LOGGING_HANDLER_MAP = {
+    "": LOG_LEVEL,
+    "authentik": LOG_LEVEL,
+    "django": "WARNING",
+    "celery": "WARNING",
+    "selenium": "WARNING",
+    "grpc": LOG_LEVEL,
+    "docker": "WARNING",
+    "urllib3": "WARNING",
+    "websockets": "WARNING",
+    "daphne": "WARNING",
+    "dbbackup": "ERROR",
+    "kubernetes": "INFO",
+    "asyncio": "WARNING",
+    "aioredis": "WARNING",
+    "s3transfer": "WARNING",
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -471,61 +480,63 @@ LOGGING = {
             "formatter": "colored" if DEBUG else "plain",
         },
     },
-    "loggers": {},
-}
-
-_LOGGING_HANDLER_MAP = {
-    "": LOG_LEVEL,
-    "authentik": LOG_LEVEL,
-    "django": "WARNING",
-    "celery": "WARNING",
-    "selenium": "WARNING",
-    "grpc": LOG_LEVEL,
-    "docker": "WARNING",
-    "urllib3": "WARNING",
-    "websockets": "WARNING",
-    "daphne": "WARNING",
-    "dbbackup": "ERROR",
-    "kubernetes": "INFO",
-    "asyncio": "WARNING",
-    "aioredis": "WARNING",
-    "s3transfer": "WARNING",
+    "loggers": {
+        handler_name: {
+            "handlers": ["console"],
+            "level": level,
+            "propagate": False,
+        }
+        for handler_name, level in _LOGGING_HANDLER_MAP.items()
+    },
 }
-for handler_name, level in _LOGGING_HANDLER_MAP.items():
-    # pyright: reportGeneralTypeIssues=false
-    LOGGING["loggers"][handler_name] = {
-        "handlers": ["console"],
-        "level": level,
-        "propagate": False,
-    }
 
 
-_DISALLOWED_ITEMS = [
-    "INSTALLED_APPS",
-    "MIDDLEWARE",
-    "AUTHENTICATION_BACKENDS",
-    "CELERY_BEAT_SCHEDULE",
-]
+_DISALLOWED_ITEMS = frozenset(
+    [
+        "INSTALLED_APPS",
+        "MIDDLEWARE",
+        "AUTHENTICATION_BACKENDS",
+        "CELERY_BEAT_SCHEDULE",
+    ]
+)
+try:
+    # Generated by scripts/build_settings_manifest.py when building the container image
+    from authentik.root._settings_manifest import SETTINGS_MODULES as _SETTINGS_MODULES
+except ImportError:
+    _SETTINGS_MODULES = None
 # Load subapps's INSTALLED_APPS
 for _app in INSTALLED_APPS:
     if _app.startswith("authentik"):
         if "apps" in _app:
             _app = ".".join(_app.split(".")[:-2])
+        _settings_module = f"{_app}.settings"
+        # Don't try to import settings of apps that don't have any
+        if _SETTINGS_MODULES is not None and _settings_module not in _SETTINGS_MODULES:
+            continue
         try:
-            app_settings = importlib.import_module("%s.settings" % _app)
-            INSTALLED_APPS.extend(getattr(app_settings, "INSTALLED_APPS", []))
-            MIDDLEWARE.extend(getattr(app_settings, "MIDDLEWARE", []))
-            AUTHENTICATION_BACKENDS.extend(getattr(app_settings, "AUTHENTICATION_BACKENDS", []))
-            CELERY_BEAT_SCHEDULE.update(getattr(app_settings, "CELERY_BEAT_SCHEDULE", {}))
-            for _attr in dir(app_settings):
-                if not _attr.startswith("__") and _attr not in _DISALLOWED_ITEMS:
-                    globals()[_attr] = getattr(app_settings, _attr)
+            app_settings = vars(importlib.import_module(_settings_module))
+            INSTALLED_APPS.extend(app_settings.get("INSTALLED_APPS", []))
+            MIDDLEWARE.extend(app_settings.get("MIDDLEWARE", []))
+            AUTHENTICATION_BACKENDS.extend(app_settings.get("AUTHENTICATION_BACKENDS", []))
+            CELERY_BEAT_SCHEDULE.update(app_settings.get("CELERY_BEAT_SCHEDULE", {}))
+            # Only names listed in the app settings' __all__ are copied
+            globals().update(
+                {
+                    _attr: app_settings[_attr]
+                    for _attr in app_settings.get("__all__", [])
+                    if _attr not in _DISALLOWED_ITEMS
+                }
+            )
         except ImportError:
             pass
 
+# Subapps might list middleware or backends which are already enabled
+MIDDLEWARE = list(dict.fromkeys(MIDDLEWARE))
+AUTHENTICATION_BACKENDS = list(dict.fromkeys(AUTHENTICATION_BACKENDS))
+
 if DEBUG:
     CELERY_TASK_ALWAYS_EAGER = True
-    os.environ[ENV_GIT_HASH_KEY] = "dev"
+    os.environ.setdefault(ENV_GIT_HASH_KEY, "dev")
 
 INSTALLED_APPS.append("authentik.core")
 INSTALLED_APPS.append("authentik.managed")
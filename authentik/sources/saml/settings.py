@@ -1,6 +1,8 @@
 """saml source settings"""
 from celery.schedules import crontab
 
+__all__ = ["CELERY_BEAT_SCHEDULE"]
+
 CELERY_BEAT_SCHEDULE = {
     "saml_source_cleanup": {
         "task": "authentik.sources.saml.tasks.clean_temporary_users",
@@ -1,5 +1,7 @@
 """Static Authenticator settings"""
 
+__all__ = ["INSTALLED_APPS"]
+
 INSTALLED_APPS = [
     "django_otp.plugins.otp_static",
 ]
@@ -1,5 +1,10 @@
 """OTP Time"""
 
+__all__ = [
+    "INSTALLED_APPS",
+    "OTP_TOTP_ISSUER",
+]
+
 INSTALLED_APPS = [
     "django_otp.plugins.otp_totp",
 ]
@@ -1,4 +1,7 @@
 """OTP Validate stage settings"""
+
+__all__ = ["INSTALLED_APPS"]
+
 INSTALLED_APPS = [
     "django_otp",
 ]
@@ -16,34 +16,37 @@ from authentik.stages.password.models import PasswordStage
 class TestIdentificationStage(TestCase):
     """Identification tests"""
 
-    def setUp(self):
-        super().setUp()
-        self.password = generate_key()
-        self.user = User.objects.create_user(
-            username="unittest", email="test@beryju.org", password=self.password
+    @classmethod
+    def setUpTestData(cls):
+        cls.password = generate_key()
+        cls.user = User.objects.create_user(
+            username="unittest", email="test@beryju.org", password=cls.password
         )
-        self.client = Client()
 
         # OAuthSource for the login view
         source = OAuthSource.objects.create(name="test", slug="test")
 
-        self.flow = Flow.objects.create(
+        cls.flow = Flow.objects.create(
             name="test-identification",
             slug="test-identification",
             designation=FlowDesignation.AUTHENTICATION,
         )
-        self.stage = IdentificationStage.objects.create(
+        cls.stage = IdentificationStage.objects.create(
             name="identification",
             user_fields=[UserFields.E_MAIL],
         )
-        self.stage.sources.set([source])
-        self.stage.save()
+        cls.stage.sources.set([source])
+        cls.stage.save()
         FlowStageBinding.objects.create(
-            target=self.flow,
-            stage=self.stage,
+            target=cls.flow,
+            stage=cls.stage,
             order=0,
         )
 
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
     def test_valid_render(self):
         """Test that View renders correctly"""
         response = self.client.get(
@@ -0,0 +1,15 @@
+"""Helper script to generate a list of all authentik apps' settings modules,
+so authentik/root/settings.py doesn't have to try to import one for every app"""
+from pathlib import Path
+
+MANIFEST = Path("authentik/root/_settings_manifest.py")
+
+modules = sorted(
+    ".".join(path.with_suffix("").parts)
+    for path in Path("authentik").glob("**/settings.py")
+    if path.parent != MANIFEST.parent
+)
+
+with open(MANIFEST, "w", encoding="utf8") as _manifest:
+    _manifest.write('"""Generated by scripts/build_settings_manifest.py, do not edit"""\n')
+    _manifest.write(f"SETTINGS_MODULES = {modules!r}\n")
@@ -0,0 +1,24 @@
+"""Ensure that loading authentik like production does doesn't import any test code"""
+import os
+import sys
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "authentik.root.settings")
+django.setup()
+
+# Importing the URLconf loads all views and API viewsets
+import authentik.root.urls  # noqa: E402  # pylint: disable=unused-import,wrong-import-position
+
+test_modules = sorted(
+    name
+    for name in sys.modules
+    if name == "django.test"
+    or name.startswith("django.test.")
+    or (name.startswith("authentik.") and ".tests" in name)
+)
+if test_modules:
+    print("Test modules imported outside of the test runner:")
+    for name in test_modules:
+        print(f"  {name}")
+    sys.exit(1)